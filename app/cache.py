@@ -0,0 +1,12 @@
+from typing import Optional
+import redis.asyncio as redis
+from app.config import get_settings
+
+settings = get_settings()
+
+
+def create_redis_client() -> Optional[redis.Redis]:
+    """Create an async Redis client, or None when caching is not configured"""
+    if not settings.redis_url:
+        return None
+    return redis.from_url(settings.redis_url, decode_responses=True)
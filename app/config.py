@@ -1,5 +1,5 @@
-from pydantic_settings import BaseSettings
-from functools import lru_cache
+from typing import List
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -19,16 +19,23 @@ class Settings(BaseSettings):
     debug: bool = True
     host: str = "0.0.0.0"
     port: int = 8000
+    cors_allow_origins: List[str] = ["http://localhost:3000", "http://localhost:8000"]
+    
+    # Redis Configuration (optional; caching is disabled when unset)
+    redis_url: str = ""
+    analysis_cache_ttl: int = 86400
     
     # LangChain Configuration
     langchain_tracing_v2: bool = False
     langchain_api_key: str = ""
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, frozen=True)
+
+
+# Built once at import; settings are immutable for the life of the process.
+# A plain global read needs no cache wrapper or locking on the hot Depends path.
+_settings = Settings()
 
 
-@lru_cache()
-def get_settings():
-    return Settings() 
\ No newline at end of file
+def get_settings() -> Settings:
+    return _settings 
\ No newline at end of file
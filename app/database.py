@@ -1,3 +1,4 @@
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -5,8 +6,17 @@ from app.config import get_settings
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Larger compiled-statement cache so hot select() statements stay compiled;
+# JSONB columns are encoded/decoded with orjson instead of the stdlib json module
+engine = create_engine(
+    settings.database_url,
+    query_cache_size=1200,
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads,
+)
+# expire_on_commit=False: async services run commits in a worker thread, and reading
+# attributes after commit must not trigger a blocking reload on the event loop
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
@@ -1,26 +1,49 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from app.routers import pii_masking, document_analysis, chat, users
+from app.services.chat_service import ChatService
+from app.services.document_analysis import DocumentAnalysisService
+from app.services.pii_masking import PIIMaskingService
 from app.config import get_settings
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create service singletons on startup and keep them on app state"""
+    app.state.chat_service = ChatService()
+    app.state.analysis_service = DocumentAnalysisService()
+    app.state.pii_service = PIIMaskingService()
+    yield
+    await app.state.analysis_service.aclose()
+    await app.state.pii_service.aclose()
+
+
 app = FastAPI(
     title="SignAware AI",
     description="AI-powered legal document analysis and PII masking service",
     version="1.0.0",
     debug=settings.debug,
+    default_response_class=ORJSONResponse,  # SSE routes return EventSourceResponse directly
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
+    allow_origins=settings.cors_allow_origins,  # Explicit list; wildcard is invalid with credentials
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Compress large JSON payloads (document analysis, masked content)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Include routers
 app.include_router(users.router)
 app.include_router(document_analysis.router)
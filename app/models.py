@@ -1,8 +1,9 @@
-from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, Enum, ForeignKey, TypeDecorator
+from sqlalchemy import Column, String, Text, Boolean, Integer, DateTime, Enum, ForeignKey, Index, TypeDecorator
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from datetime import datetime, timezone
 import enum
 
 
@@ -41,6 +42,8 @@ class EnumAsString(TypeDecorator):
     
     def __init__(self, enum_class, *args, **kwargs):
         self.enum_class = enum_class
+        # Precompute value -> member lookup so reads don't scan the enum per row
+        self._value_map = {enum_item.value: enum_item for enum_item in enum_class}
         super().__init__(*args, **kwargs)
     
     def process_bind_param(self, value, dialect):
@@ -55,19 +58,20 @@ class EnumAsString(TypeDecorator):
         """Convert string value back to enum when reading from database"""
         if value is None:
             return None
-        # Find enum by value
-        for enum_item in self.enum_class:
-            if enum_item.value == value:
-                return enum_item
-        # If not found, return the raw value
-        return value
+        # Find enum by value; if not found, return the raw value
+        return self._value_map.get(value, value)
+
+
+def utcnow() -> datetime:
+    """Timezone-aware current UTC time for Python-side column defaults"""
+    return datetime.now(timezone.utc)
 
 
 class User(Base):
     __tablename__ = "users"
 
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.uuid_generate_v4())
-    email = Column(String, nullable=False, unique=True)
+    email = Column(String, nullable=False, unique=True, index=True)
     password = Column('password', String, nullable=True)
     firstName = Column('firstName', String, nullable=True)
     lastName = Column('lastName', String, nullable=True)
@@ -80,8 +84,8 @@ class User(Base):
     passwordResetExpires = Column('passwordResetExpires', DateTime, nullable=True)
     isActive = Column('isActive', Boolean, nullable=False, default=True)
     lastLoginAt = Column('lastLoginAt', DateTime, nullable=True)
-    createdAt = Column('createdAt', DateTime(timezone=True), nullable=False, server_default=func.now())
-    updatedAt = Column('updatedAt', DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    createdAt = Column('createdAt', DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+    updatedAt = Column('updatedAt', DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now(), onupdate=utcnow)
 
     # Relationships
     documents = relationship("Document", back_populates="user", cascade="all, delete-orphan")
@@ -98,16 +102,21 @@ class Document(Base):
     filePath = Column('filePath', String, nullable=True)
     fileSize = Column('fileSize', Integer, nullable=True)
     mimeType = Column('mimeType', String, nullable=True)
-    type = Column('type', EnumAsString(DocumentType), nullable=False, default=DocumentType.OTHER)
-    status = Column(EnumAsString(DocumentStatus), nullable=False, default=DocumentStatus.PENDING)
+    type = Column('type', EnumAsString(DocumentType), nullable=False, default=DocumentType.OTHER, index=True)
+    status = Column(EnumAsString(DocumentStatus), nullable=False, default=DocumentStatus.PENDING, index=True)
     analysis = Column(JSONB, nullable=True)  # Store analysis results here
     maskedContent = Column('maskedContent', JSONB, nullable=True)  # Store masked content here
     processingStartedAt = Column('processingStartedAt', DateTime, nullable=True)
     processingCompletedAt = Column('processingCompletedAt', DateTime, nullable=True)
     errorMessage = Column('errorMessage', String, nullable=True)
     userId = Column('userId', UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    createdAt = Column('createdAt', DateTime(timezone=True), nullable=False, server_default=func.now())
-    updatedAt = Column('updatedAt', DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    createdAt = Column('createdAt', DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now(), index=True)
+    updatedAt = Column('updatedAt', DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now(), onupdate=utcnow)
+
+    # Composite index for the per-user document listing (filter by user, newest first)
+    __table_args__ = (
+        Index("ix_doc_user_created", "userId", "createdAt"),
+    )
 
     # Relationships
     user = relationship("User", back_populates="documents")
@@ -120,13 +129,38 @@ class ChatMessage(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.uuid_generate_v4())
     content = Column('content', Text, nullable=False)
     role = Column('role', EnumAsString(ChatMessageRole), nullable=False, default=ChatMessageRole.USER)
-    sessionId = Column('sessionId', String, nullable=True)
+    sessionId = Column('sessionId', String, nullable=True, index=True)
     message_metadata = Column('metadata', JSONB, nullable=True)  # Maps to 'metadata' column in database
     userId = Column('userId', UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    documentId = Column('documentId', UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
-    createdAt = Column('createdAt', DateTime(timezone=True), nullable=False, server_default=func.now())
-    updatedAt = Column('updatedAt', DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    documentId = Column('documentId', UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    createdAt = Column('createdAt', DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+    updatedAt = Column('updatedAt', DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now(), onupdate=utcnow)
+
+    # Composite index matching the session filter plus the createdAt ordering, so
+    # history, sessions list and delete-session are a single index range scan
+    __table_args__ = (
+        Index("ix_chat_msgs_u_d_s_created", "userId", "documentId", "sessionId", "createdAt"),
+    )
 
     # Relationships
     user = relationship("User", back_populates="chat_messages")
-    document = relationship("Document", back_populates="chat_messages") 
\ No newline at end of file
+    document = relationship("Document", back_populates="chat_messages") 
+
+
+class ChatSummary(Base):
+    """Rolling summary of chat messages that have aged out of the LLM history window"""
+    __tablename__ = "chat_summaries"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.uuid_generate_v4())
+    sessionId = Column('sessionId', String, nullable=False)
+    summary = Column('summary', Text, nullable=False)
+    summarizedUntil = Column('summarizedUntil', DateTime(timezone=True), nullable=False)  # createdAt of the last folded message
+    userId = Column('userId', UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    documentId = Column('documentId', UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    createdAt = Column('createdAt', DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+    updatedAt = Column('updatedAt', DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now(), onupdate=utcnow)
+
+    # One summary per session; rows are removed by the database FK cascades
+    __table_args__ = (
+        Index("ix_chat_summaries_u_d_s", "userId", "documentId", "sessionId", unique=True),
+    )
@@ -1,22 +1,29 @@
-import json
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from sse_starlette.sse import EventSourceResponse
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 from uuid import UUID
 from typing import List
+from app.models import ChatMessage, ChatSummary
 from app.schemas import ChatRequest, ChatResponse, ChatHistoryResponse
 from app.services.chat_service import ChatService
 from app.database import get_db
 
 router = APIRouter(prefix="/api/v1/chat", tags=["Chat"])
-chat_service = ChatService()
+
+
+def get_chat_service(request: Request) -> ChatService:
+    """Chat service dependency, created once in the app lifespan"""
+    return request.app.state.chat_service
 
 
 @router.post("/stream")
 async def chat_stream(
     request: ChatRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
 ):
     """
     Chat with the AI assistant using Server-Sent Events (SSE) for streaming responses.
@@ -26,36 +33,41 @@ async def chat_stream(
     try:
         async def event_stream():
             message_id = None
+            # The envelope around each chunk is constant for the stream, so
+            # encode it once and only serialize the chunk content per token
+            session_id = request.session_id
+            doc_id_str = str(request.document_id)
+            data_prefix = '{"content":'
+            data_suffix = (
+                f',"session_id":{orjson.dumps(session_id).decode()}'
+                f',"document_id":"{doc_id_str}"}}'
+            )
             async for chunk, msg_id in chat_service.chat_stream(
                 message=request.message,
-                session_id=request.session_id,
+                session_id=session_id,
                 document_id=request.document_id,
                 user_id=request.user_id,
                 db=db
             ):
                 if chunk:  # Only send non-empty chunks
-                    # Format as SSE data
-                    yield {
-                        "event": "message",
-                        "data": json.dumps({
-                            "content": chunk, 
-                            "session_id": request.session_id,
-                            "document_id": str(request.document_id)
-                        })
-                    }
+                    # Yield a ready event so sse_starlette skips dict conversion
+                    yield ServerSentEvent(
+                        event="message",
+                        data=data_prefix + orjson.dumps(chunk).decode() + data_suffix
+                    )
                 
                 if msg_id:  # Final message with ID
                     message_id = msg_id
             
             # Send end event with message ID
-            yield {
-                "event": "end",
-                "data": json.dumps({
-                    "session_id": request.session_id,
-                    "document_id": str(request.document_id),
+            yield ServerSentEvent(
+                event="end",
+                data=orjson.dumps({
+                    "session_id": session_id,
+                    "document_id": doc_id_str,
                     "message_id": str(message_id) if message_id else None
-                })
-            }
+                }).decode()
+            )
 
         return EventSourceResponse(event_stream())
     
@@ -66,13 +78,14 @@ async def chat_stream(
 @router.post("/message", response_model=ChatResponse)
 async def chat_message(
     request: ChatRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
 ):
     """
     Non-streaming chat endpoint that returns the complete response.
     """
     try:
-        complete_response = ""
+        response_parts = []
         message_id = None
         
         async for chunk, msg_id in chat_service.chat_stream(
@@ -83,12 +96,12 @@ async def chat_message(
             db=db
         ):
             if chunk:
-                complete_response += chunk
+                response_parts.append(chunk)
             if msg_id:
                 message_id = msg_id
         
         return ChatResponse(
-            response=complete_response,
+            response="".join(response_parts),
             session_id=request.session_id,
             message_id=message_id
         )
@@ -98,17 +111,18 @@ async def chat_message(
 
 
 @router.get("/history/{session_id}", response_model=ChatHistoryResponse)
-async def get_chat_history(
+def get_chat_history(
     session_id: str,
     document_id: UUID,
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
 ):
     """
     Retrieve the chat history for a specific session and document.
     """
     try:
-        messages = await chat_service.get_chat_history(session_id, document_id, user_id, db)
+        messages = chat_service.get_chat_history(session_id, document_id, user_id, db)
         return ChatHistoryResponse(
             session_id=session_id,
             document_id=document_id,
@@ -121,10 +135,11 @@ async def get_chat_history(
 
 
 @router.get("/sessions/{document_id}")
-async def get_chat_sessions(
+def get_chat_sessions(
     document_id: UUID,
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
 ):
     """
     Get all chat sessions for a document.
@@ -142,7 +157,7 @@ async def get_chat_sessions(
 
 
 @router.delete("/sessions/{session_id}")
-async def delete_chat_session(
+def delete_chat_session(
     session_id: str,
     document_id: UUID,
     user_id: UUID,
@@ -152,14 +167,18 @@ async def delete_chat_session(
     Delete all messages in a chat session.
     """
     try:
-        from app.models import ChatMessage
-        
-        # Delete all messages in the session
-        deleted_count = db.query(ChatMessage).filter(
+        # Delete all messages in the session with a single plain SQL DELETE
+        stmt = delete(ChatMessage).where(
             ChatMessage.sessionId == session_id,
             ChatMessage.documentId == document_id,
             ChatMessage.userId == user_id
-        ).delete()
+        ).execution_options(synchronize_session=False)
+        deleted_count = db.execute(stmt).rowcount
+        db.execute(delete(ChatSummary).where(
+            ChatSummary.sessionId == session_id,
+            ChatSummary.documentId == document_id,
+            ChatSummary.userId == user_id
+        ).execution_options(synchronize_session=False))
         
         db.commit()
         
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session, noload
 from uuid import UUID
 from typing import List
 from app.schemas import (
     DocumentCreate, 
     DocumentResponse, 
+    DocumentListItem,
     AnalyzeDocumentRequest,
     AnalyzeDocumentResponse,
     DocumentAnalysisRequest
@@ -14,11 +17,51 @@ from app.models import Document, DocumentType, DocumentStatus
 from app.database import get_db
 
 router = APIRouter(prefix="/api/v1/documents", tags=["Document Management"])
-analysis_service = DocumentAnalysisService()
+
+# Built once at import and reused across requests
+_document_adapter = TypeAdapter(DocumentResponse)
+_document_list_adapter = TypeAdapter(List[DocumentListItem])
+
+# Only the columns DocumentResponse exposes (skips maskedContent, filePath, ...)
+_DOCUMENT_RESPONSE_COLUMNS = (
+    Document.id,
+    Document.title,
+    Document.content,
+    Document.originalFileName,
+    Document.type,
+    Document.status,
+    Document.analysis,
+    Document.processingStartedAt,
+    Document.processingCompletedAt,
+    Document.errorMessage,
+    Document.userId,
+    Document.createdAt,
+    Document.updatedAt,
+)
+
+# Only the columns DocumentListItem exposes (no content or analysis bodies)
+_DOCUMENT_LIST_COLUMNS = (
+    Document.id,
+    Document.title,
+    Document.originalFileName,
+    Document.type,
+    Document.status,
+    Document.processingStartedAt,
+    Document.processingCompletedAt,
+    Document.errorMessage,
+    Document.userId,
+    Document.createdAt,
+    Document.updatedAt,
+)
+
+
+def get_analysis_service(request: Request) -> DocumentAnalysisService:
+    """Document analysis service dependency, created once in the app lifespan"""
+    return request.app.state.analysis_service
 
 
 @router.post("/", response_model=DocumentResponse)
-async def create_document(
+def create_document(
     document: DocumentCreate,
     user_id: UUID,
     db: Session = Depends(get_db)
@@ -41,14 +84,14 @@ async def create_document(
         db.commit()
         db.refresh(db_document)
         
-        return DocumentResponse.model_validate(db_document)
+        return _document_adapter.validate_python(db_document, from_attributes=True)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create document: {str(e)}")
 
 
-@router.get("/", response_model=List[DocumentResponse])
-async def get_user_documents(
+@router.get("/", response_model=List[DocumentListItem])
+def get_user_documents(
     user_id: UUID,
     document_type: DocumentType = None,
     status: DocumentStatus = None,
@@ -60,24 +103,25 @@ async def get_user_documents(
     Get all documents for a user with optional filtering.
     """
     try:
-        query = db.query(Document).filter(Document.userId == user_id)
+        stmt = select(*_DOCUMENT_LIST_COLUMNS).where(Document.userId == user_id)
         
         if document_type:
-            query = query.filter(Document.type == document_type)
+            stmt = stmt.where(Document.type == document_type)
         
         if status:
-            query = query.filter(Document.status == status)
+            stmt = stmt.where(Document.status == status)
         
-        documents = query.order_by(Document.createdAt.desc()).offset(skip).limit(limit).all()
+        stmt = stmt.order_by(Document.createdAt.desc()).offset(skip).limit(limit)
         
-        return [DocumentResponse.model_validate(doc) for doc in documents]
+        # The page is bounded by limit, so fetch it in one round-trip and validate at once
+        return _document_list_adapter.validate_python(db.execute(stmt).mappings().all())
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve documents: {str(e)}")
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-async def get_document(
+def get_document(
     document_id: UUID,
     user_id: UUID,
     db: Session = Depends(get_db)
@@ -86,15 +130,15 @@ async def get_document(
     Get a specific document by ID.
     """
     try:
-        document = db.query(Document).filter(
+        document = db.execute(select(Document).options(noload("*")).where(
             Document.id == document_id,
             Document.userId == user_id
-        ).first()
+        )).scalar_one_or_none()
         
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        return DocumentResponse.model_validate(document)
+        return _document_adapter.validate_python(document, from_attributes=True)
     
     except HTTPException:
         raise
@@ -106,7 +150,8 @@ async def get_document(
 async def analyze_document(
     document_id: UUID,
     request: AnalyzeDocumentRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    analysis_service: DocumentAnalysisService = Depends(get_analysis_service)
 ):
     """
     Analyze a legal document and extract key information including:
@@ -129,10 +174,11 @@ async def analyze_document(
 
 
 @router.get("/{document_id}/analysis", response_model=AnalyzeDocumentResponse)
-async def get_document_analysis(
+def get_document_analysis(
     document_id: UUID, 
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    analysis_service: DocumentAnalysisService = Depends(get_analysis_service)
 ):
     """
     Retrieve analysis results for a document.
@@ -147,7 +193,7 @@ async def get_document_analysis(
 
 
 @router.delete("/{document_id}")
-async def delete_document(
+def delete_document(
     document_id: UUID,
     user_id: UUID,
     db: Session = Depends(get_db)
@@ -156,10 +202,10 @@ async def delete_document(
     Delete a document and all associated data.
     """
     try:
-        document = db.query(Document).filter(
+        document = db.execute(select(Document).where(
             Document.id == document_id,
             Document.userId == user_id
-        ).first()
+        )).scalar_one_or_none()
         
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
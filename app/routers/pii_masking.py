@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from uuid import UUID
 from app.schemas import PIIMaskingRequest, PIIMaskingResponse
@@ -6,11 +6,19 @@ from app.services.pii_masking import PIIMaskingService
 from app.database import get_db
 
 router = APIRouter(prefix="/api/v1/pii", tags=["PII Masking"])
-pii_service = PIIMaskingService()
+
+
+def get_pii_service(request: Request) -> PIIMaskingService:
+    """PII masking service dependency, created once in the app lifespan"""
+    return request.app.state.pii_service
 
 
 @router.post("/mask", response_model=PIIMaskingResponse)
-async def mask_pii_text(request: PIIMaskingRequest, db: Session = Depends(get_db)):
+async def mask_pii_text(
+    request: PIIMaskingRequest,
+    db: Session = Depends(get_db),
+    pii_service: PIIMaskingService = Depends(get_pii_service)
+):
     """
     Mask personally identifiable information (PII) in the provided text.
     Uses locally running Deepseek-R1:8B model on Ollama.
@@ -30,7 +38,8 @@ async def mask_pii_text(request: PIIMaskingRequest, db: Session = Depends(get_db
 async def mask_document_pii(
     document_id: UUID,
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    pii_service: PIIMaskingService = Depends(get_pii_service)
 ):
     """
     Mask PII in a document's content and store the result in the database.
@@ -45,16 +54,17 @@ async def mask_document_pii(
 
 
 @router.get("/masked/{document_id}")
-async def get_masked_document_content(
+def get_masked_document_content(
     document_id: UUID,
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    pii_service: PIIMaskingService = Depends(get_pii_service)
 ):
     """
     Retrieve masked content for a document.
     """
     try:
-        result = await pii_service.get_masked_content(document_id, user_id, db)
+        result = pii_service.get_masked_content(document_id, user_id, db)
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import Session, noload
 from uuid import UUID
 from typing import List
 from app.schemas import UserCreate, UserResponse
@@ -8,16 +10,19 @@ from app.database import get_db
 
 router = APIRouter(prefix="/api/v1/users", tags=["User Management"])
 
+# Reused across requests instead of re-entering model_validate per call
+_user_adapter = TypeAdapter(UserResponse)
+
 
 @router.post("/", response_model=UserResponse)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     Create a new user account.
     """
     try:
-        # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user.email).first()
-        if existing_user:
+        # Check if user already exists (select only the PK, no User instance)
+        user_exists = db.execute(select(User.id).where(User.email == user.email)).first() is not None
+        if user_exists:
             raise HTTPException(status_code=400, detail="User with this email already exists")
         
         # Create new user
@@ -35,7 +40,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(db_user)
         
-        return UserResponse.model_validate(db_user)
+        return _user_adapter.validate_python(db_user, from_attributes=True)
     
     except HTTPException:
         raise
@@ -44,16 +49,16 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: UUID, db: Session = Depends(get_db)):
+def get_user(user_id: UUID, db: Session = Depends(get_db)):
     """
     Get user information by ID.
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.execute(select(User).options(noload("*")).where(User.id == user_id)).scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        return UserResponse.model_validate(user)
+        return _user_adapter.validate_python(user, from_attributes=True)
     
     except HTTPException:
         raise
@@ -62,16 +67,16 @@ async def get_user(user_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/email/{email}", response_model=UserResponse)
-async def get_user_by_email(email: str, db: Session = Depends(get_db)):
+def get_user_by_email(email: str, db: Session = Depends(get_db)):
     """
     Get user information by email.
     """
     try:
-        user = db.query(User).filter(User.email == email).first()
+        user = db.execute(select(User).options(noload("*")).where(User.email == email)).scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        return UserResponse.model_validate(user)
+        return _user_adapter.validate_python(user, from_attributes=True)
     
     except HTTPException:
         raise
@@ -80,7 +85,7 @@ async def get_user_by_email(email: str, db: Session = Depends(get_db)):
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: UUID, 
     user_update: UserCreate, 
     db: Session = Depends(get_db)
@@ -89,7 +94,7 @@ async def update_user(
     Update user information.
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -100,7 +105,7 @@ async def update_user(
         db.commit()
         db.refresh(user)
         
-        return UserResponse.model_validate(user)
+        return _user_adapter.validate_python(user, from_attributes=True)
     
     except HTTPException:
         raise
@@ -109,12 +114,12 @@ async def update_user(
 
 
 @router.delete("/{user_id}")
-async def delete_user(user_id: UUID, db: Session = Depends(get_db)):
+def delete_user(user_id: UUID, db: Session = Depends(get_db)):
     """
     Delete a user account and all associated data.
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from uuid import UUID
@@ -27,8 +27,7 @@ class UserResponse(UserBase):
     createdAt: datetime
     updatedAt: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=False)
 
 
 # PII Masking schemas
@@ -43,6 +42,10 @@ class PIIMaskingResponse(BaseModel):
     masked_length: int
 
 
+# Case-insensitive lookup of DocumentType by value or by name (for backward compatibility)
+_DOCTYPE_LOOKUP = {dt.value.lower(): dt for dt in DocumentType} | {dt.name.lower(): dt for dt in DocumentType}
+
+
 # Document schemas
 class DocumentCreate(BaseModel):
     title: str
@@ -55,19 +58,8 @@ class DocumentCreate(BaseModel):
     @classmethod
     def convert_document_type(cls, v):
         """Convert case-insensitive string to proper DocumentType enum"""
-        if isinstance(v, str):
-            # Handle case-insensitive conversion
-            v_lower = v.lower()
-            for doc_type in DocumentType:
-                if doc_type.value == v_lower:
-                    return doc_type
-            # If not found by value, try by name (for backward compatibility)
-            v_upper = v.upper()
-            for doc_type in DocumentType:
-                if doc_type.name == v_upper:
-                    return doc_type
-            # If still not found, let Pydantic handle the validation error
-        return v
+        # Unknown strings pass through so Pydantic reports the validation error
+        return _DOCTYPE_LOOKUP.get(v.lower(), v) if isinstance(v, str) else v
 
 
 class DocumentAnalysisResult(BaseModel):
@@ -98,8 +90,24 @@ class DocumentResponse(BaseModel):
     createdAt: datetime
     updatedAt: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=False)
+
+
+class DocumentListItem(BaseModel):
+    """Document summary for list pages, without the content and analysis bodies"""
+    id: UUID
+    title: str
+    originalFileName: Optional[str] = None
+    type: DocumentType
+    status: DocumentStatus
+    processingStartedAt: Optional[datetime] = None
+    processingCompletedAt: Optional[datetime] = None
+    errorMessage: Optional[str] = None
+    userId: UUID
+    createdAt: datetime
+    updatedAt: datetime
+
+    model_config = ConfigDict(from_attributes=True, defer_build=False)
 
 
 class DocumentAnalysisRequest(BaseModel):
@@ -125,8 +133,7 @@ class ChatMessageResponse(BaseModel):
     documentId: UUID
     createdAt: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=False)
 
 
 class ChatRequest(BaseModel):
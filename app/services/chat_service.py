@@ -1,16 +1,66 @@
+import asyncio
+import logging
+import time
 import uuid
+from collections import OrderedDict
 from typing import AsyncGenerator, Dict, Any, List, Optional
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, noload
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from app.config import get_settings
-from app.models import Document, ChatMessage, ChatMessageRole, DocumentStatus
+from app.models import Document, ChatMessage, ChatMessageRole, ChatSummary, DocumentStatus, utcnow
 from app.schemas import ChatMessageResponse
+from app.services.document_lookup import get_user_document
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Max number of formatted document contexts kept in memory per ChatService
+CONTEXT_CACHE_SIZE = 256
+
+# Prior messages (user + assistant) always sent verbatim to the LLM with each turn
+HISTORY_WINDOW_MESSAGES = 20
+
+# Once this many messages beyond the window are unsummarized, fold them into the
+# session's rolling summary (so the window holds between 20 and 30 messages)
+SUMMARY_BATCH_MESSAGES = 10
+
+# Upper bound on messages folded per turn, so a long backlog (e.g. a session that
+# predates summaries) is caught up oldest-first over a few turns
+SUMMARY_FOLD_MAX_MESSAGES = 50
+
+# Streamed tokens are coalesced and sent once this many characters are pending
+# or this many seconds have passed since the last send
+STREAM_FLUSH_CHARS = 32
+STREAM_FLUSH_INTERVAL = 0.02
+
+# Contains no per-turn values: for a given document analysis the system message is
+# byte-identical across turns, so the provider can reuse its cached prompt prefix
+SYSTEM_PROMPT_TEMPLATE = """You are a helpful AI assistant specialized in analyzing and discussing legal documents. 
+You have access to the following document analysis:
+
+{document_context}
+
+Use this analysis to answer questions about the document. Be helpful, accurate, and always refer back to the specific 
+analysis when relevant. If a user asks about something not covered in the analysis, politely explain that you can 
+only discuss what's covered in the provided document analysis.
+
+Always maintain a professional and helpful tone while being thorough in your responses."""
+
+SUMMARY_PROMPT_TEMPLATE = """Update the running summary of a conversation between a user and an AI assistant about a legal document.
+
+Current summary:
+{summary}
+
+Messages to add to the summary:
+{messages}
+
+Write a concise summary that keeps the user's questions, the key points of the answers, and any facts or preferences the user stated. Respond with the summary only."""
 
 
 class ChatService:
@@ -21,20 +71,33 @@ class ChatService:
             temperature=0.7,
             streaming=True
         )
+        # LRU of formatted contexts keyed on (document id, title, status, analyzed_at)
+        self._context_cache: "OrderedDict[tuple, str]" = OrderedDict()
 
-    def _get_document_context(self, document_id: UUID, user_id: UUID, db: Session) -> str:
+    def _get_document_context(self, document: Optional[Document]) -> str:
         """Get document analysis context for the chat"""
-        document = db.query(Document).filter(
-            Document.id == document_id,
-            Document.userId == user_id
-        ).first()
-        
         if not document:
             return "No document found or access denied."
         
         if not document.analysis:
             return f"Document '{document.title}' has not been analyzed yet. Please analyze the document first to get detailed insights."
 
+        # A new analysis changes analyzed_at, which invalidates the cached entry
+        cache_key = (document.id, document.title, document.status, document.analysis.get('analyzed_at'))
+        context = self._context_cache.get(cache_key)
+        if context is not None:
+            self._context_cache.move_to_end(cache_key)
+            return context
+
+        context = self._format_document_context(document)
+        self._context_cache[cache_key] = context
+        if len(self._context_cache) > CONTEXT_CACHE_SIZE:
+            self._context_cache.popitem(last=False)
+        return context
+
+    @staticmethod
+    def _format_document_context(document: Document) -> str:
+        """Render the document analysis as prompt context"""
         analysis = document.analysis
         context = f"""
 Document Information:
@@ -64,39 +127,135 @@ Analysis Date: {analysis.get('analyzed_at', 'Unknown')}
 """
         return context
 
-    def _save_message(self, content: str, role: ChatMessageRole, session_id: str, 
-                     document_id: UUID, user_id: UUID, db: Session) -> ChatMessage:
-        """Save a chat message to the database"""
-        message = ChatMessage(
+    def _save_message(self, content: str, role: ChatMessageRole, session_id: str,
+                      document_id: UUID, user_id: UUID, db: Session) -> UUID:
+        """Insert a chat message without committing and return its ID"""
+        # INSERT ... RETURNING gets the generated ID in the same round-trip,
+        # so there is no refresh SELECT afterwards. The caller commits.
+        stmt = insert(ChatMessage).values(
             content=content,
             role=role,
             sessionId=session_id,
             documentId=document_id,
-            userId=user_id,
-            message_metadata={"timestamp": datetime.utcnow().isoformat()}
-        )
-        db.add(message)
-        db.commit()
-        db.refresh(message)
-        return message
-
-    def _get_conversation_history(self, session_id: str, document_id: UUID, user_id: UUID, db: Session) -> List[Dict[str, str]]:
-        """Get conversation history for context"""
-        messages = db.query(ChatMessage).filter(
+            userId=user_id
+        ).returning(ChatMessage.id)
+        return db.execute(stmt).scalar_one()
+
+    def _get_conversation_history(self, session_id: str, document_id: UUID, user_id: UUID, db: Session,
+                                  limit: int, since: Optional[datetime] = None,
+                                  before: Optional[datetime] = None,
+                                  oldest_first: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get up to `limit` conversation messages in chronological order.
+        The newest matching messages are kept, or the oldest with oldest_first.
+        """
+        stmt = select(ChatMessage.role, ChatMessage.content, ChatMessage.createdAt).where(
             ChatMessage.sessionId == session_id,
             ChatMessage.documentId == document_id,
             ChatMessage.userId == user_id
-        ).order_by(ChatMessage.createdAt).all()
+        )
+        if since is not None:
+            stmt = stmt.where(ChatMessage.createdAt > since)
+        if before is not None:
+            stmt = stmt.where(ChatMessage.createdAt < before)
+        if oldest_first:
+            rows = db.execute(stmt.order_by(ChatMessage.createdAt).limit(limit)).all()
+        else:
+            # Newest first so LIMIT keeps the latest messages, then restore chronological order
+            rows = list(reversed(db.execute(stmt.order_by(ChatMessage.createdAt.desc()).limit(limit)).all()))
         
         history = []
-        for msg in messages:
+        for row in rows:
             history.append({
-                "role": msg.role.value,
-                "content": msg.content
+                "role": row.role.value,
+                "content": row.content,
+                "created_at": row.createdAt
             })
         
         return history
 
+    def _get_summary(self, session_id: str, document_id: UUID, user_id: UUID, db: Session) -> Optional[ChatSummary]:
+        """Get the rolling summary of older messages in a session, if any"""
+        return db.execute(select(ChatSummary).where(
+            ChatSummary.sessionId == session_id,
+            ChatSummary.documentId == document_id,
+            ChatSummary.userId == user_id
+        )).scalar_one_or_none()
+
+    def _load_turn_context(self, session_id: str, document_id: UUID, user_id: UUID, db: Session
+                           ) -> tuple[Optional[Document], Optional[ChatSummary], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Load the document, rolling summary and recent history needed for one chat turn,
+        plus the oldest unsummarized messages to fold into the summary when a fold is due
+        """
+        document = get_user_document(db, document_id, user_id, columns=(Document.analysis,))
+        if not document:
+            return None, None, [], []
+        summary = self._get_summary(session_id, document_id, user_id, db)
+        since = summary.summarizedUntil if summary else None
+        history = self._get_conversation_history(
+            session_id, document_id, user_id, db,
+            limit=HISTORY_WINDOW_MESSAGES + SUMMARY_BATCH_MESSAGES,
+            since=since
+        )
+        
+        # A full page means older unsummarized messages may exist beyond it; fold from
+        # the oldest pending message so none is skipped, never from the page's tail
+        to_fold = []
+        if len(history) >= HISTORY_WINDOW_MESSAGES + SUMMARY_BATCH_MESSAGES:
+            to_fold = self._get_conversation_history(
+                session_id, document_id, user_id, db,
+                limit=SUMMARY_FOLD_MAX_MESSAGES,
+                since=since,
+                before=history[-HISTORY_WINDOW_MESSAGES]["created_at"],
+                oldest_first=True
+            )
+        return document, summary, history, to_fold
+
+    def _upsert_summary(self, text: str, summarized_until: datetime, session_id: str,
+                        document_id: UUID, user_id: UUID, db: Session):
+        """Create or update the session's rolling summary and commit it"""
+        # ON CONFLICT keeps concurrent turns on one session from both inserting a row;
+        # committing right away avoids holding the row lock while the reply streams
+        stmt = pg_insert(ChatSummary).values(
+            sessionId=session_id,
+            documentId=document_id,
+            userId=user_id,
+            summary=text,
+            summarizedUntil=summarized_until
+        )
+        try:
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[ChatSummary.userId, ChatSummary.documentId, ChatSummary.sessionId],
+                set_={
+                    "summary": stmt.excluded.summary,
+                    "summarizedUntil": stmt.excluded.summarizedUntil,
+                    "updatedAt": utcnow()
+                },
+                # A slower concurrent turn must not replace a newer summary with an older one
+                where=ChatSummary.summarizedUntil < stmt.excluded.summarizedUntil
+            ))
+            db.commit()
+        except Exception:
+            # Leave the session usable for the rest of the turn
+            db.rollback()
+            raise
+
+    async def _fold_into_summary(self, summary_text: Optional[str], messages: List[Dict[str, Any]],
+                                 session_id: str, document_id: UUID, user_id: UUID, db: Session) -> str:
+        """Summarize messages into the session's rolling summary and return the new text"""
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        response = await self.llm.ainvoke([HumanMessage(content=SUMMARY_PROMPT_TEMPLATE.format(
+            summary=summary_text or "(none yet)",
+            messages=transcript
+        ))])
+        
+        await asyncio.to_thread(
+            self._upsert_summary, response.content, messages[-1]["created_at"],
+            session_id, document_id, user_id, db
+        )
+        return response.content
+
     async def chat_stream(
         self, 
         message: str, 
@@ -109,48 +268,54 @@ Analysis Date: {analysis.get('analyzed_at', 'Unknown')}
         Stream chat response using Server-Sent Events
         Returns tuples of (chunk, message_id) where message_id is only set for the final chunk
         """
-        # Verify document access
-        document = db.query(Document).filter(
-            Document.id == document_id,
-            Document.userId == user_id
-        ).first()
+        # Document, summary and history are read in a single worker-thread hop
+        document, summary, conversation_history, to_fold = await asyncio.to_thread(
+            self._load_turn_context, session_id, document_id, user_id, db
+        )
         
         if not document:
             yield ("Error: Document not found or access denied.", None)
             return
         
-        # Save user message
-        user_message = self._save_message(
-            content=message,
-            role=ChatMessageRole.USER,
-            session_id=session_id,
-            document_id=document_id,
-            user_id=user_id,
-            db=db
+        # Keep this as its own commit before streaming; do not defer it to batch with
+        # the reply. A client disconnect cancels this generator with CancelledError,
+        # which the except below does not catch, so anything still uncommitted at that
+        # point (including the user's question) would be lost.
+        await asyncio.to_thread(
+            self._save_message, message, ChatMessageRole.USER, session_id, document_id, user_id, db
         )
+        await asyncio.to_thread(db.commit)
+        
+        summary_text = summary.summary if summary else None
         
         try:
-            # Get document context and conversation history
-            document_context = self._get_document_context(document_id, user_id, db)
-            conversation_history = self._get_conversation_history(session_id, document_id, user_id, db)
+            # Get document context
+            document_context = self._get_document_context(document)
+            
+            # Fold the oldest messages that have aged out of the window into the summary
+            if to_fold:
+                try:
+                    summary_text = await self._fold_into_summary(
+                        summary_text, to_fold, session_id, document_id, user_id, db
+                    )
+                    folded_until = to_fold[-1]["created_at"]
+                    conversation_history = [
+                        msg for msg in conversation_history if msg["created_at"] > folded_until
+                    ]
+                except Exception as e:
+                    # summarizedUntil is unchanged, so the same messages are retried next turn
+                    logger.warning("Failed to update chat summary for session %s: %s", session_id, e)
             
             # Build messages for the LLM
-            system_prompt = f"""You are a helpful AI assistant specialized in analyzing and discussing legal documents. 
-You have access to the following document analysis:
-
-{document_context}
-
-Use this analysis to answer questions about the document. Be helpful, accurate, and always refer back to the specific 
-analysis when relevant. If a user asks about something not covered in the analysis, politely explain that you can 
-only discuss what's covered in the provided document analysis.
-
-Always maintain a professional and helpful tone while being thorough in your responses."""
+            system_prompt = SYSTEM_PROMPT_TEMPLATE.format(document_context=document_context)
 
             # Prepare messages including conversation history
             messages = [SystemMessage(content=system_prompt)]
+            if summary_text:
+                messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary_text}"))
             
-            # Add conversation history (excluding the current message we just saved)
-            for hist_msg in conversation_history[:-1]:  # Exclude the last message (current user message)
+            # Add recent conversation history
+            for hist_msg in conversation_history:
                 if hist_msg["role"] == "user":
                     messages.append(HumanMessage(content=hist_msg["content"]))
                 elif hist_msg["role"] == "assistant":
@@ -160,45 +325,64 @@ Always maintain a professional and helpful tone while being thorough in your res
             messages.append(HumanMessage(content=message))
 
             # Stream response
-            complete_response = ""
+            chunks: List[str] = []
+            pending: List[str] = []
+            pending_len = 0
+            last_flush = time.monotonic()
             async for chunk in self.llm.astream(messages):
                 if hasattr(chunk, 'content') and chunk.content:
-                    complete_response += chunk.content
-                    yield (chunk.content, None)
+                    chunks.append(chunk.content)
+                    pending.append(chunk.content)
+                    pending_len += len(chunk.content)
+                    # Coalesce single-token chunks into fewer, larger SSE events
+                    now = time.monotonic()
+                    if pending_len >= STREAM_FLUSH_CHARS or now - last_flush > STREAM_FLUSH_INTERVAL:
+                        yield ("".join(pending), None)
+                        pending.clear()
+                        pending_len = 0
+                        last_flush = now
+            if pending:
+                yield ("".join(pending), None)
+            complete_response = "".join(chunks)
 
             # Save assistant response
+            assistant_message_id = None
             if complete_response:
-                assistant_message = self._save_message(
-                    content=complete_response,
-                    role=ChatMessageRole.ASSISTANT,
-                    session_id=session_id,
-                    document_id=document_id,
-                    user_id=user_id,
-                    db=db
+                assistant_message_id = await asyncio.to_thread(
+                    self._save_message, complete_response, ChatMessageRole.ASSISTANT,
+                    session_id, document_id, user_id, db
                 )
+                await asyncio.to_thread(db.commit)
+
+            if assistant_message_id:
                 # Yield final chunk with message ID
-                yield ("", assistant_message.id)
+                yield ("", assistant_message_id)
 
         except Exception as e:
             error_message = f"Sorry, I encountered an error: {str(e)}"
-            # Save error message
-            assistant_message = self._save_message(
-                content=error_message,
-                role=ChatMessageRole.ASSISTANT,
-                session_id=session_id,
-                document_id=document_id,
-                user_id=user_id,
-                db=db
-            )
-            yield (error_message, assistant_message.id)
+            # A failed flush or commit leaves the session unusable until rolled back
+            await asyncio.to_thread(db.rollback)
+            # Save error message; a second failure must not escape mid-stream
+            assistant_message_id = None
+            try:
+                assistant_message_id = await asyncio.to_thread(
+                    self._save_message, error_message, ChatMessageRole.ASSISTANT,
+                    session_id, document_id, user_id, db
+                )
+                await asyncio.to_thread(db.commit)
+            except Exception as save_error:
+                await asyncio.to_thread(db.rollback)
+                assistant_message_id = None
+                logger.warning("Failed to save chat error message for session %s: %s", session_id, save_error)
+            yield (error_message, assistant_message_id)
 
-    async def get_chat_history(self, session_id: str, document_id: UUID, user_id: UUID, db: Session) -> List[ChatMessageResponse]:
+    def get_chat_history(self, session_id: str, document_id: UUID, user_id: UUID, db: Session) -> List[ChatMessageResponse]:
         """Get chat history for a session and document"""
-        messages = db.query(ChatMessage).filter(
+        messages = db.execute(select(ChatMessage).options(noload("*")).where(
             ChatMessage.sessionId == session_id,
             ChatMessage.documentId == document_id,
             ChatMessage.userId == user_id
-        ).order_by(ChatMessage.createdAt).all()
+        ).order_by(ChatMessage.createdAt)).scalars().all()
         
         return [
             ChatMessageResponse(
@@ -216,41 +400,42 @@ Always maintain a professional and helpful tone while being thorough in your res
 
     def get_chat_sessions(self, document_id: UUID, user_id: UUID, db: Session) -> List[dict]:
         """Get all chat sessions for a document"""
-        sessions = db.query(ChatMessage.sessionId).filter(
+        session_filters = (
             ChatMessage.documentId == document_id,
             ChatMessage.userId == user_id,
             ChatMessage.sessionId.isnot(None)
-        ).distinct().all()
+        )
+        
+        # Per-session message count and first/last timestamps in one query
+        sessions = db.execute(
+            select(
+                ChatMessage.sessionId,
+                func.min(ChatMessage.createdAt).label("created_at"),
+                func.max(ChatMessage.createdAt).label("updated_at"),
+                func.count().label("message_count")
+            ).where(*session_filters).group_by(ChatMessage.sessionId)
+        ).all()
+        
+        # First message content per session (Postgres DISTINCT ON)
+        first_messages = dict(
+            db.execute(
+                select(ChatMessage.sessionId, ChatMessage.content)
+                .where(*session_filters)
+                .distinct(ChatMessage.sessionId)
+                .order_by(ChatMessage.sessionId, ChatMessage.createdAt)
+            ).all()
+        )
         
         session_info = []
         for session in sessions:
-            session_id = session[0]
-            # Get first and last message for each session
-            first_message = db.query(ChatMessage).filter(
-                ChatMessage.sessionId == session_id,
-                ChatMessage.documentId == document_id,
-                ChatMessage.userId == user_id
-            ).order_by(ChatMessage.createdAt).first()
-            
-            last_message = db.query(ChatMessage).filter(
-                ChatMessage.sessionId == session_id,
-                ChatMessage.documentId == document_id,
-                ChatMessage.userId == user_id
-            ).order_by(ChatMessage.createdAt.desc()).first()
-            
-            message_count = db.query(ChatMessage).filter(
-                ChatMessage.sessionId == session_id,
-                ChatMessage.documentId == document_id,
-                ChatMessage.userId == user_id
-            ).count()
-            
+            first_message = first_messages.get(session.sessionId, "")
             session_info.append({
-                "session_id": session_id,
+                "session_id": session.sessionId,
                 "document_id": document_id,
-                "first_message": first_message.content[:100] + "..." if first_message and len(first_message.content) > 100 else first_message.content if first_message else "",
-                "message_count": message_count,
-                "created_at": first_message.createdAt if first_message else None,
-                "updated_at": last_message.createdAt if last_message else None
+                "first_message": first_message[:100] + "..." if len(first_message) > 100 else first_message,
+                "message_count": session.message_count,
+                "created_at": session.created_at,
+                "updated_at": session.updated_at
             })
         
-        return sorted(session_info, key=lambda x: x["updated_at"] or x["created_at"], reverse=True) 
\ No newline at end of file
+        return sorted(session_info, key=lambda x: x["updated_at"] or x["created_at"], reverse=True)
\ No newline at end of file
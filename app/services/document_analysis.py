@@ -1,17 +1,50 @@
+import asyncio
 import hashlib
+import logging
 from datetime import datetime
 from uuid import UUID
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from sqlalchemy.orm import Session
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import PromptTemplate
 from pydantic import BaseModel, Field
+from redis.exceptions import RedisError
+from app.cache import create_redis_client
 from app.config import get_settings
 from app.models import Document, DocumentStatus
 from app.schemas import DocumentAnalysisResult, AnalyzeDocumentResponse
+from app.services.document_lookup import get_user_document
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ANALYSIS_PROMPT_TEMPLATE = """You are an expert legal analyst. Analyze the following legal document and provide a comprehensive analysis.
+
+Document Title: {title}
+Document Type: {doc_type}
+Content Source: {content_source} content ({content_description})
+
+Document Content:
+{content}
+
+Please analyze this document and provide:
+
+1. A comprehensive summary of the document
+2. Any hidden or obscure clauses that might not be immediately apparent
+3. A risk assessment explaining potential risks to the user
+4. Any loopholes you can identify
+5. Red flags or concerning elements
+6. A risk score out of 5 (1 = low risk, 5 = high risk)
+7. Your confidence rating as a percentage (0-100)
+8. Key concerns that users should be aware of
+
+Be thorough and critical in your analysis. Focus on protecting the user's interests.
+Consider the document type when analyzing - different types of documents have different risk patterns.
+{content_note}
+
+{format_instructions}
+"""
 
 
 class AnalysisResult(BaseModel):
@@ -34,23 +67,78 @@ class DocumentAnalysisService:
             temperature=0.3
         )
         self.output_parser = PydanticOutputParser(pydantic_object=AnalysisResult)
+        # Prompt and chain are built once; each analysis only invokes them
+        self._prompt = PromptTemplate(
+            template=ANALYSIS_PROMPT_TEMPLATE,
+            input_variables=["title", "doc_type", "content", "content_source", "content_description", "content_note"],
+            partial_variables={"format_instructions": self.output_parser.get_format_instructions()}
+        )
+        self._chain = self._prompt | self.llm | self.output_parser
+        self.cache = create_redis_client()
+
+    async def aclose(self):
+        """Release the cache connection pool"""
+        if self.cache is not None:
+            await self.cache.aclose()
+
+    @staticmethod
+    def _analysis_cache_key(content: str, doc_type: str, title: str, content_source: str) -> str:
+        """Cache key for an analysis of identical prompt inputs and model"""
+        # Separator keeps ("ab", "c") and ("a", "bc") from hashing the same
+        key_parts = (content, doc_type, title, content_source, settings.openai_model)
+        digest = hashlib.sha256("\x1f".join(key_parts).encode()).hexdigest()
+        return f"docanal:{digest}"
+
+    async def _get_cached_analysis(self, key: str) -> Optional[AnalysisResult]:
+        """Return a cached LLM analysis, or None on miss or cache failure"""
+        if self.cache is None:
+            return None
+        try:
+            cached = await self.cache.get(key)
+        except RedisError as e:
+            logger.warning("Analysis cache lookup failed: %s", e)
+            return None
+        return AnalysisResult.model_validate_json(cached) if cached else None
+
+    async def _set_cached_analysis(self, key: str, result: AnalysisResult):
+        """Store an LLM analysis in the cache, ignoring cache failures"""
+        if self.cache is None:
+            return
+        try:
+            await self.cache.setex(key, settings.analysis_cache_ttl, result.model_dump_json())
+        except RedisError as e:
+            logger.warning("Analysis cache store failed: %s", e)
+
+    @staticmethod
+    def _load_stored_analysis(analysis: Dict[str, Any]) -> DocumentAnalysisResult:
+        """Rebuild an analysis this service stored without re-validating every field"""
+        # The JSONB payload was produced by model_dump(mode='json'), so only the
+        # ISO timestamp needs converting back
+        return DocumentAnalysisResult.model_construct(**{
+            **analysis,
+            "analyzed_at": datetime.fromisoformat(analysis["analyzed_at"])
+        })
 
     async def analyze_document(self, document_id: UUID, user_id: UUID, db: Session) -> AnalyzeDocumentResponse:
         """
         Analyze a legal document and store results in the database.
         """
         # Get the document
-        document = db.query(Document).filter(
-            Document.id == document_id,
-            Document.userId == user_id
-        ).first()
+        document = await asyncio.to_thread(get_user_document, db, document_id, user_id, columns=(
+            Document.content,
+            Document.maskedContent,
+            Document.analysis,
+            Document.processingStartedAt,
+            Document.processingCompletedAt,
+            Document.errorMessage
+        ))
         
         if not document:
             raise ValueError(f"Document {document_id} not found or access denied")
         
         # Check if already analyzed and completed
         if document.status == DocumentStatus.COMPLETED and document.analysis:
-            analysis_result = DocumentAnalysisResult(**document.analysis)
+            analysis_result = self._load_stored_analysis(document.analysis)
             return AnalyzeDocumentResponse(
                 document_id=document.id,
                 status=document.status,
@@ -64,7 +152,7 @@ class DocumentAnalysisService:
             document.status = DocumentStatus.PROCESSING
             document.processingStartedAt = datetime.utcnow()
             document.errorMessage = None
-            db.commit()
+            await asyncio.to_thread(db.commit)
 
             # Determine which content to use for analysis
             content_for_analysis = document.content  # Default to original content
@@ -82,48 +170,23 @@ class DocumentAnalysisService:
             else:
                 print(f"No masked content available for document {document_id}, using original content")
 
-            # Create prompt template
-            prompt = PromptTemplate(
-                template="""You are an expert legal analyst. Analyze the following legal document and provide a comprehensive analysis.
-
-Document Title: {title}
-Document Type: {doc_type}
-Content Source: {content_source} content ({content_description})
-
-Document Content:
-{content}
-
-Please analyze this document and provide:
-
-1. A comprehensive summary of the document
-2. Any hidden or obscure clauses that might not be immediately apparent
-3. A risk assessment explaining potential risks to the user
-4. Any loopholes you can identify
-5. Red flags or concerning elements
-6. A risk score out of 5 (1 = low risk, 5 = high risk)
-7. Your confidence rating as a percentage (0-100)
-8. Key concerns that users should be aware of
-
-Be thorough and critical in your analysis. Focus on protecting the user's interests.
-Consider the document type when analyzing - different types of documents have different risk patterns.
-{content_note}
-
-{format_instructions}
-""",
-                input_variables=["title", "doc_type", "content", "content_source", "content_description", "content_note"],
-                partial_variables={"format_instructions": self.output_parser.get_format_instructions()}
+            # Reuse a cached analysis of identical content before calling the LLM
+            cache_key = self._analysis_cache_key(
+                content_for_analysis, document.type.value, document.title, content_source
             )
+            result = await self._get_cached_analysis(cache_key)
 
-            # Generate analysis
-            chain = prompt | self.llm | self.output_parser
-            result = await chain.ainvoke({
-                "title": document.title,
-                "doc_type": document.type.value,
-                "content": content_for_analysis,
-                "content_source": content_source,
-                "content_description": content_description,
-                "content_note": content_note
-            })
+            if result is None:
+                # Generate analysis
+                result = await self._chain.ainvoke({
+                    "title": document.title,
+                    "doc_type": document.type.value,
+                    "content": content_for_analysis,
+                    "content_source": content_source,
+                    "content_description": content_description,
+                    "content_note": content_note
+                })
+                await self._set_cached_analysis(cache_key, result)
 
             # Create analysis result with timestamp
             analysis_data = DocumentAnalysisResult(
@@ -143,8 +206,8 @@ Consider the document type when analyzing - different types of documents have di
             document.status = DocumentStatus.COMPLETED
             document.processingCompletedAt = datetime.utcnow()
             
-            db.commit()
-            db.refresh(document)
+            await asyncio.to_thread(db.commit)
+            await asyncio.to_thread(db.refresh, document)
 
             return AnalyzeDocumentResponse(
                 document_id=document.id,
@@ -159,7 +222,7 @@ Consider the document type when analyzing - different types of documents have di
             document.status = DocumentStatus.FAILED
             document.errorMessage = str(e)
             document.processingCompletedAt = datetime.utcnow()
-            db.commit()
+            await asyncio.to_thread(db.commit)
             
             return AnalyzeDocumentResponse(
                 document_id=document.id,
@@ -173,17 +236,19 @@ Consider the document type when analyzing - different types of documents have di
         """
         Retrieve analysis results for a document.
         """
-        document = db.query(Document).filter(
-            Document.id == document_id,
-            Document.userId == user_id
-        ).first()
+        document = get_user_document(db, document_id, user_id, columns=(
+            Document.analysis,
+            Document.processingStartedAt,
+            Document.processingCompletedAt,
+            Document.errorMessage
+        ))
         
         if not document:
             raise ValueError(f"Document {document_id} not found or access denied")
         
         analysis_result = None
         if document.analysis:
-            analysis_result = DocumentAnalysisResult(**document.analysis)
+            analysis_result = self._load_stored_analysis(document.analysis)
         
         return AnalyzeDocumentResponse(
             document_id=document.id,
@@ -0,0 +1,29 @@
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.orm import Session, load_only, noload
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from app.models import Document
+
+# Lightweight columns always loaded; heavy content/JSONB columns are opt-in
+_BASE_COLUMNS = (Document.id, Document.userId, Document.title, Document.type, Document.status)
+
+
+def get_user_document(
+    db: Session,
+    document_id: UUID,
+    user_id: UUID,
+    columns: tuple[InstrumentedAttribute, ...] = ()
+) -> Optional[Document]:
+    """
+    Load a document owned by the user, or None if it doesn't exist or access is denied.
+    Only the base columns plus the requested extra columns are fetched.
+    """
+    stmt = select(Document).options(
+        load_only(*_BASE_COLUMNS, *columns),
+        noload("*")
+    ).where(
+        Document.id == document_id,
+        Document.userId == user_id
+    )
+    return db.execute(stmt).scalar_one_or_none()
@@ -1,24 +1,115 @@
+import asyncio
 import httpx
 import json
+import re
+import orjson
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.config import get_settings
 from app.models import Document
+from app.services.document_lookup import get_user_document
 
 settings = get_settings()
 
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_SECTION_NUMBER = r"\d+(?:\.\d+)*"
+
+# Either a legal section reference such as "section 1.2.3.4" or "sections 1.2.3.4
+# and 5.6.7.8" (kept as is, including every number in the list), or an IPv4 address
+_IP_ADDRESS_RE = re.compile(
+    r"(?P<ref>(?:\b(?:sections?|secs?\.|clauses?|articles?|paragraphs?)|§§?)\s*"
+    rf"{_SECTION_NUMBER}(?:(?:\s*,\s*(?:and\s+|or\s+)?|\s+(?:and|or|to|through)\s+|\s*[-–]\s*){_SECTION_NUMBER})*)"
+    rf"|(?<![\d.])\b{_OCTET}(?:\.{_OCTET}){{3}}\b(?!\.\d)",
+    re.IGNORECASE,
+)
+
+
+def _mask_ip_address(match: re.Match) -> str:
+    """Placeholder for an IP address match, unless it is a section reference"""
+    if match.group("ref"):
+        return match.group(0)
+    return "[IP_ADDRESS]"
+
+
+# 13-19 digit runs, optionally grouped with spaces or dashes
+_CREDIT_CARD_RE = re.compile(r"\b\d(?:[ -]?\d){12,18}\b")
+
+
+def _luhn_valid(digits: str) -> bool:
+    """Luhn checksum used by payment card numbers"""
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        n = int(digit)
+        if i % 2:
+            n *= 2
+            if n > 9:
+                n -= 9
+        total += n
+    return total % 10 == 0
+
+
+def _mask_credit_card(match: re.Match) -> str:
+    """Placeholder for a card number match; other long numbers (years, order or
+    reference numbers) fail the Luhn check and are kept"""
+    digits = re.sub(r"\D", "", match.group(0))
+    if 13 <= len(digits) <= 19 and _luhn_valid(digits):
+        return "[CREDIT_CARD]"
+    return match.group(0)
+
+
+# Structured PII that regexes catch reliably, masked before any LLM call.
+# Order matters: SSNs and card numbers must be replaced before phone numbers.
+_PII_PATTERNS = [
+    (re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b"), "[EMAIL]"),
+    (re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "[SSN]"),
+    (_CREDIT_CARD_RE, _mask_credit_card),
+    (_IP_ADDRESS_RE, _mask_ip_address),
+    (re.compile(r"(?:\+?1[ .-]?)?(?:\(\d{3}\)|\b\d{3})[ .-]?\d{3}[ .-]\d{4}\b"), "[PHONE]"),
+]
+
+# Text with no word characters outside placeholders (empty, whitespace, punctuation
+# or only [EMAIL]-style tags) has nothing left for the LLM to mask
+_FULLY_MASKED_RE = re.compile(r"\A(?:\[[A-Z_]+\]|[^\w])*\Z")
+
+
+# deepseek-r1 reasoning block, and a leading "Here is the masked text:" style line
+_THINK_RE = re.compile(r"<think>.*?</think>\s*", re.DOTALL)
+_PREAMBLE_RE = re.compile(r"\A\s*(?:Here|The|I've|This)\b[^\n]*:[ \t]*\n")
+
+
+def _mask_structured_pii(text: str) -> str:
+    """Replace regex-detectable PII with bracketed placeholders"""
+    for pattern, placeholder in _PII_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
 
 class PIIMaskingService:
     def __init__(self):
         self.ollama_url = f"{settings.ollama_base_url}/api/generate"
         self.model = settings.ollama_model
+        # Shared keep-alive pool to Ollama for the life of the service
+        self.http_client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
+
+    async def aclose(self):
+        """Close the pooled Ollama HTTP connections"""
+        await self.http_client.aclose()
 
     async def mask_pii(self, text: str) -> str:
         """
         Mask PII information in the provided text using Ollama deepseek-r1 model.
         Skip the thinking step and return only the masked content.
+        Structured PII is masked with regexes first and the pre-masked text is then
+        sent to the LLM; the call is skipped only when nothing unmasked remains.
         """
+        text = _mask_structured_pii(text)
+        if _FULLY_MASKED_RE.match(text):
+            return text
+
         prompt = f"""You are a PII (Personally Identifiable Information) masking expert. Your task is to identify and mask any PII in the provided text while preserving the document's meaning and structure.
 
 PII to mask includes:
@@ -44,6 +135,7 @@ Instructions:
 4. If no PII is found, return the original text unchanged
 5. Respond ONLY with the masked text, no explanations, thinking process, or additional content
 6. Do not include any reasoning or analysis - just provide the final masked text
+7. Keep existing placeholders such as [EMAIL] or [SSN] exactly as they are
 
 Text to mask:
 {text}
@@ -53,48 +145,38 @@ Masked text:"""
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
             "options": {
                 "temperature": 0.1,
                 "top_p": 0.9,
             }
         }
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(self.ollama_url, json=payload)
+        # Ollama streams one JSON object per line; collect tokens as they arrive
+        response_parts = []
+        async with self.http_client.stream("POST", self.ollama_url, json=payload) as response:
             response.raise_for_status()
-            
-            result = response.json()
-            raw_response = result.get("response", "")
-            
-            # Skip thinking step if present (deepseek-r1 specific)
-            if "<think>" in raw_response and "</think>" in raw_response:
-                # Extract content after thinking block
-                thinking_end = raw_response.find("</think>")
-                if thinking_end != -1:
-                    raw_response = raw_response[thinking_end + 8:].strip()
-            
-            # Clean up the response to get only the masked content
-            lines = raw_response.split('\n')
-            masked_content = []
-            
-            for line in lines:
-                line = line.strip()
-                # Skip empty lines and explanatory text
-                if line and not line.startswith(("Here", "The", "I've", "This")):
-                    masked_content.append(line)
-            
-            return ' '.join(masked_content) if masked_content else raw_response.strip()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                response_parts.append(chunk.get("response", ""))
+                if chunk.get("done"):
+                    break
+        raw_response = "".join(response_parts)
+        
+        # Skip thinking step (deepseek-r1 specific) and any explanation preamble
+        masked_content = _PREAMBLE_RE.sub("", _THINK_RE.sub("", raw_response)).strip()
+        return masked_content or raw_response.strip()
 
     async def mask_document_content(self, document_id: UUID, user_id: UUID, db: Session) -> dict:
         """
         Mask PII in a document's content and store the result.
         """
         # Get the document
-        document = db.query(Document).filter(
-            Document.id == document_id,
-            Document.userId == user_id
-        ).first()
+        document = await asyncio.to_thread(
+            get_user_document, db, document_id, user_id, columns=(Document.content,)
+        )
         
         if not document:
             raise ValueError(f"Document {document_id} not found or access denied")
@@ -115,8 +197,8 @@ Masked text:"""
             
             # Store in the maskedContent field
             document.maskedContent = masked_data
-            db.commit()
-            db.refresh(document)
+            await asyncio.to_thread(db.commit)
+            await asyncio.to_thread(db.refresh, document)
             
             return {
                 "document_id": document.id,
@@ -129,14 +211,11 @@ Masked text:"""
         except Exception as e:
             raise Exception(f"Failed to mask document content: {str(e)}")
 
-    async def get_masked_content(self, document_id: UUID, user_id: UUID, db: Session) -> dict:
+    def get_masked_content(self, document_id: UUID, user_id: UUID, db: Session) -> dict:
         """
         Retrieve masked content for a document.
         """
-        document = db.query(Document).filter(
-            Document.id == document_id,
-            Document.userId == user_id
-        ).first()
+        document = get_user_document(db, document_id, user_id, columns=(Document.maskedContent,))
         
         if not document:
             raise ValueError(f"Document {document_id} not found or access denied")
@@ -3,6 +3,9 @@
 Simple run script for SignAware AI application.
 """
 
+import os
+import sys
+
 import uvicorn
 from app.config import get_settings
 
@@ -13,6 +16,9 @@ def main():
     print(f"   Host: {settings.host}")
     print(f"   Port: {settings.port}")
     print(f"   Debug: {settings.debug}")
+    # Reload only works with a single process; otherwise use one worker per core
+    workers = 1 if settings.debug else (os.cpu_count() or 2)
+    print(f"   Workers: {workers}")
     print(f"   Docs: http://{settings.host}:{settings.port}/docs")
     
     uvicorn.run(
@@ -20,7 +26,12 @@ def main():
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
-        access_log=True,
+        workers=workers,
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        log_level="info",
+        access_log=settings.debug,
     )
 
 if __name__ == "__main__":
@@ -2,59 +2,77 @@
 """
 Database initialization script for SignAware AI.
 This script creates the necessary database tables.
+
+Run from the project root as a module: uv run python -m scripts.init_db
 """
 
 import sys
-import os
-
-# Add the app directory to the path so we can import modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from sqlalchemy import create_engine, text
-from app.database import Base
-from app.models import User, Document, ChatMessage
 from app.config import get_settings
 
-def init_db():
+settings = get_settings()
+
+def make_engine():
+    """Create the pooled script engine with psycopg2's batched executemany enabled."""
+    # values_plus_batch folds multi-row INSERTs into paged multi-VALUES statements
+    # and runs other executemany statements through execute_batch
+    return create_engine(
+        settings.database_url,
+        pool_size=5,
+        max_overflow=5,
+        # pre_ping replaces stale pooled connections, e.g. after a long-idle database
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        connect_args={"connect_timeout": 5, "options": "-c statement_timeout=30000"},
+        executemany_mode="values_plus_batch",
+        insertmanyvalues_page_size=1000,
+        executemany_batch_page_size=500,
+    )
+
+# Shared by init_db and create_sample_data so the script connects once
+_engine = make_engine()
+
+def init_db(engine):
     """Initialize the database with all tables."""
-    settings = get_settings()
+    from app.database import Base
+    import app.models  # noqa: F401 - registers the tables on Base.metadata
     
     print(f"Connecting to database: {settings.database_url}")
     
-    # Create engine
-    engine = create_engine(settings.database_url)
-    
     try:
-        # Test connection first
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            if result.fetchone():
-                print("✅ Database connection test successful!")
-        
-        # Create uuid-ossp extension if it doesn't exist
-        print("Creating UUID extension...")
-        with engine.connect() as conn:
+        # Connection test, extension and tables share one connection and transaction
+        with engine.begin() as conn:
+            # The checkout is already verified by pool_pre_ping
+            print("✅ Database connection successful!")
+            
+            # Fail fast instead of queueing behind a concurrent init holding DDL locks
+            conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+            
+            # Create uuid-ossp extension if it doesn't exist
+            print("Creating UUID extension...")
             conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"'))
-            conn.commit()
             print("✅ UUID extension created/verified!")
+            
+            # Create all tables
+            print("Creating database tables...")
+            Base.metadata.create_all(bind=conn, checkfirst=True)
+            print("✅ Database tables created successfully!")
+            
+            # Verify only the expected tables with one filtered catalog query
+            expected_tables = ['users', 'documents', 'chat_messages', 'chat_summaries']
+            present = set(conn.execute(
+                text("SELECT tablename FROM pg_tables WHERE schemaname = current_schema() AND tablename = ANY(:names)"),
+                {"names": expected_tables}
+            ).scalars().all())
         
-        # Create all tables
-        print("Creating database tables...")
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created successfully!")
-        
-        # Verify tables exist
-        from sqlalchemy import inspect
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        
-        expected_tables = ['users', 'documents', 'chat_messages']
         for table in expected_tables:
-            if table in tables:
+            if table in present:
                 print(f"✅ Table '{table}' created successfully")
             else:
                 print(f"⚠️  Table '{table}' not found")
         
+        tables = [table.name for table in Base.metadata.sorted_tables]
         print(f"\n📊 Database Summary:")
         print(f"   - Total tables created: {len(tables)}")
         print(f"   - Tables: {', '.join(tables)}")
@@ -68,55 +86,59 @@ def init_db():
         print("4. Verify PostgreSQL user has proper permissions")
         sys.exit(1)
 
-def create_sample_data():
+def create_sample_data(engine):
     """Create some sample data for testing (optional)."""
-    settings = get_settings()
-    engine = create_engine(settings.database_url)
-    
+    from sqlalchemy import func, insert, select
     from sqlalchemy.orm import sessionmaker
-    from app.models import User, DocumentType, DocumentStatus
+    from app.models import User, UserRole, Document, DocumentType, DocumentStatus
     
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = SessionLocal()
     
     try:
         # Check if we already have users
-        user_count = db.query(User).count()
+        user_count = db.execute(select(func.count()).select_from(User)).scalar_one()
         if user_count > 0:
             print(f"✅ Database already has {user_count} users. Skipping sample data creation.")
             return
         
-        # Create a sample user
-        sample_user = User(
-            email="admin@signaware.ai",
-            firstName="Admin",
-            lastName="User",
-            role="admin",
-            isEmailVerified=True,
-            isActive=True
-        )
-        
-        db.add(sample_user)
-        db.commit()
-        db.refresh(sample_user)
+        # Create the sample users in one INSERT ... RETURNING round-trip
+        users = [
+            {
+                "email": "admin@signaware.ai",
+                "firstName": "Admin",
+                "lastName": "User",
+                "role": UserRole.ADMIN,
+                "isEmailVerified": True,
+                "isActive": True
+            }
+        ]
+        user_ids = db.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True), users
+        ).scalars().all()
         
-        print(f"✅ Sample user created: {sample_user.email} (ID: {sample_user.id})")
+        for user, user_id in zip(users, user_ids):
+            print(f"✅ Sample user created: {user['email']} (ID: {user_id})")
         
-        # Create a sample document
-        from app.models import Document
-        sample_document = Document(
-            title="Sample Terms of Service",
-            content="This is a sample terms of service document for testing purposes.",
-            type=DocumentType.TERMS_OF_SERVICE,
-            status=DocumentStatus.PENDING,
-            userId=sample_user.id
-        )
+        # Create one sample document per user, again in a single round-trip
+        documents = [
+            {
+                "title": "Sample Terms of Service",
+                "content": "This is a sample terms of service document for testing purposes.",
+                "type": DocumentType.TERMS_OF_SERVICE,
+                "status": DocumentStatus.PENDING,
+                "userId": user_id
+            }
+            for user_id in user_ids
+        ]
+        document_ids = db.execute(
+            insert(Document).returning(Document.id, sort_by_parameter_order=True), documents
+        ).scalars().all()
         
-        db.add(sample_document)
         db.commit()
-        db.refresh(sample_document)
         
-        print(f"✅ Sample document created: {sample_document.title} (ID: {sample_document.id})")
+        for document, document_id in zip(documents, document_ids):
+            print(f"✅ Sample document created: {document['title']} (ID: {document_id})")
         
     except Exception as e:
         print(f"⚠️  Error creating sample data: {e}")
@@ -129,16 +151,16 @@ if __name__ == "__main__":
     print("=" * 50)
     
     # Initialize database
-    init_db()
+    init_db(_engine)
     
     # Ask user if they want to create sample data
     create_sample = input("\n❓ Create sample data for testing? (y/N): ").lower().strip()
     if create_sample in ['y', 'yes']:
         print("\n📝 Creating sample data...")
-        create_sample_data()
+        create_sample_data(_engine)
     
     print("\n✨ Database initialization completed!")
     print("\n📋 Next steps:")
     print("   1. Start the application: uv run python run.py")
-    print("   2. Test the APIs: uv run python scripts/test_api.py")
+    print("   2. Test the APIs: uv run python -m scripts.test_api")
     print("   3. Visit http://localhost:8000/docs for API documentation") 
\ No newline at end of file
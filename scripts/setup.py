@@ -8,6 +8,12 @@ import os
 import sys
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+def _get_ollama_tags():
+    """Fetch the list of locally available Ollama models."""
+    import httpx
+    return httpx.get("http://localhost:11434/api/tags", timeout=5.0)
 
 def check_prerequisites():
     """Check if required tools are installed."""
@@ -20,36 +26,44 @@ def check_prerequisites():
     else:
         print("✅ Python version OK")
     
-    # Check if uv is installed
-    try:
-        subprocess.run(["uv", "--version"], check=True, capture_output=True)
-        print("✅ uv is installed")
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("❌ uv is not installed. Please install it first:")
-        print("   curl -LsSf https://astral.sh/uv/install.sh | sh")
-        return False
-    
-    # Check if Ollama is running
-    try:
-        import httpx
-        response = httpx.get("http://localhost:11434/api/tags", timeout=5.0)
-        if response.status_code == 200:
-            print("✅ Ollama is running")
-            
-            # Check if deepseek-r1:8b is available
-            models = response.json().get("models", [])
-            deepseek_available = any("deepseek-r1" in model.get("name", "") for model in models)
-            
-            if deepseek_available:
-                print("✅ Deepseek-R1:8B model is available")
+    # The uv and Ollama checks are independent, so run them concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # The version output is not used, so discard it instead of buffering it
+        uv_future = executor.submit(
+            subprocess.run, ["uv", "--version"], check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        ollama_future = executor.submit(_get_ollama_tags)
+        
+        # Check if uv is installed
+        try:
+            uv_future.result()
+            print("✅ uv is installed")
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            print("❌ uv is not installed. Please install it first:")
+            print("   curl -LsSf https://astral.sh/uv/install.sh | sh")
+            return False
+        
+        # Check if Ollama is running
+        try:
+            response = ollama_future.result()
+            if response.status_code == 200:
+                print("✅ Ollama is running")
+                
+                # Check if deepseek-r1:8b is available
+                names = {model.get("name", "") for model in response.json().get("models", [])}
+                deepseek_available = any(name.startswith("deepseek-r1") for name in names)
+                
+                if deepseek_available:
+                    print("✅ Deepseek-R1:8B model is available")
+                else:
+                    print("⚠️  Deepseek-R1:8B model not found. Please run:")
+                    print("   ollama pull deepseek-r1:8b")
             else:
-                print("⚠️  Deepseek-R1:8B model not found. Please run:")
-                print("   ollama pull deepseek-r1:8b")
-        else:
-            print("⚠️  Ollama is not responding correctly")
-    except Exception:
-        print("⚠️  Could not connect to Ollama. Make sure it's running:")
-        print("   ollama serve")
+                print("⚠️  Ollama is not responding correctly")
+        except Exception:
+            print("⚠️  Could not connect to Ollama. Make sure it's running:")
+            print("   ollama serve")
     
     return True
 
@@ -59,7 +73,7 @@ def setup_environment():
     
     if not os.path.exists(".env"):
         if os.path.exists("env.template"):
-            shutil.copy("env.template", ".env")
+            shutil.copyfile("env.template", ".env")
             print("✅ Created .env file from template")
             print("⚠️  Please edit .env file with your actual configuration:")
             print("   - Set your OpenAI API key")
@@ -90,7 +104,7 @@ def init_database():
     print("\n🗄️  Initializing database...")
     
     try:
-        subprocess.run(["uv", "run", "python", "scripts/init_db.py"], check=True)
+        subprocess.run(["uv", "run", "python", "-m", "scripts.init_db"], check=True)
         print("✅ Database initialized successfully")
         return True
     except subprocess.CalledProcessError as e:
@@ -123,11 +137,11 @@ def main():
     print("   2. Make sure PostgreSQL is running")
     print("   3. Make sure Ollama is running with deepseek-r1:8b")
     print("   4. Initialize the database:")
-    print("      uv run python scripts/init_db.py")
+    print("      uv run python -m scripts.init_db")
     print("   5. Start the application:")
     print("      uv run python run.py")
     print("   6. Test the APIs:")
-    print("      uv run python scripts/test_api.py")
+    print("      uv run python -m scripts.test_api")
     print(f"   7. Visit http://localhost:8000/docs for API documentation")
     
     return 0
@@ -2,16 +2,39 @@
 """
 Test script for SignAware AI APIs.
 This script demonstrates how to use all the main endpoints with the new database schema.
+
+Run from the project root as a module: uv run python -m scripts.test_api
 """
 
 import asyncio
+import importlib.util
 import httpx
 import json
+import orjson
 from typing import Optional
 from uuid import uuid4
 
 BASE_URL = "http://localhost:8000"
 
+# Shared by every test so connections are reused; created on first use
+_client: Optional[httpx.AsyncClient] = None
+
+# HTTP/2 needs the optional h2 package (httpx[http2]) and is only negotiated over
+# TLS, e.g. behind an HTTP/2-terminating proxy; plain uvicorn keeps HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+async def get_client() -> httpx.AsyncClient:
+    """Return the pooled API client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+    return _client
+
 # Sample legal document for testing
 SAMPLE_DOCUMENT = """
 TERMS OF SERVICE
@@ -40,22 +63,32 @@ My social security number is 123-45-6789 and my credit card number is 4532-1234-
 I live at 123 Main Street, Anytown, NY 12345.
 """
 
+# The sample payloads are constant, so encode them once up front
+_JSON_HEADERS = {"content-type": "application/json"}
+_SAMPLE_DOC_JSON = orjson.dumps({
+    "title": "Sample Terms of Service",
+    "content": SAMPLE_DOCUMENT,
+    "type": "terms_of_service",
+    "originalFileName": "terms_of_service.txt"
+})
+_SAMPLE_PII_TEXT_JSON = orjson.dumps(SAMPLE_PII_TEXT)
+
 async def test_health_check():
     """Test the health check endpoint."""
     print("\n🏥 Testing Health Check...")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{BASE_URL}/health", timeout=10.0)
-            response.raise_for_status()
-            
-            result = response.json()
-            print(f"✅ Health check passed: {result['message']}")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Health check failed: {e}")
-            return False
+    client = await get_client()
+    try:
+        response = await client.get("/health", timeout=10.0)
+        response.raise_for_status()
+        
+        result = response.json()
+        print(f"✅ Health check passed: {result['message']}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Health check failed: {e}")
+        return False
 
 async def test_create_user():
     """Test creating a test user."""
@@ -69,61 +102,55 @@ async def test_create_user():
         "password": "testpassword123"
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/api/v1/users/",
-                json=user_data,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            user_id = result['id']
-            print(f"✅ User created successfully!")
-            print(f"   - User ID: {user_id}")
-            print(f"   - Email: {result['email']}")
-            print(f"   - Name: {result['firstName']} {result['lastName']}")
-            
-            return user_id
-            
-        except Exception as e:
-            print(f"❌ User creation failed: {e}")
-            return None
+    client = await get_client()
+    try:
+        response = await client.post(
+            "/api/v1/users/",
+            json=user_data,
+            timeout=30.0
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        user_id = result['id']
+        print(f"✅ User created successfully!")
+        print(f"   - User ID: {user_id}")
+        print(f"   - Email: {result['email']}")
+        print(f"   - Name: {result['firstName']} {result['lastName']}")
+        
+        return user_id
+        
+    except Exception as e:
+        print(f"❌ User creation failed: {e}")
+        return None
 
 async def test_create_document(user_id: str):
     """Test creating a document."""
     print("\n📄 Testing Document Creation...")
     
-    document_data = {
-        "title": "Sample Terms of Service",
-        "content": SAMPLE_DOCUMENT,
-        "type": "terms_of_service",
-        "originalFileName": "terms_of_service.txt"
-    }
-    
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/api/v1/documents/?user_id={user_id}",
-                json=document_data,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            document_id = result['id']
-            print(f"✅ Document created successfully!")
-            print(f"   - Document ID: {document_id}")
-            print(f"   - Title: {result['title']}")
-            print(f"   - Type: {result['type']}")
-            print(f"   - Status: {result['status']}")
-            
-            return document_id
-            
-        except Exception as e:
-            print(f"❌ Document creation failed: {e}")
-            return None
+    client = await get_client()
+    try:
+        response = await client.post(
+            f"/api/v1/documents/?user_id={user_id}",
+            content=_SAMPLE_DOC_JSON,
+            headers=_JSON_HEADERS,
+            timeout=30.0
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        document_id = result['id']
+        print(f"✅ Document created successfully!")
+        print(f"   - Document ID: {document_id}")
+        print(f"   - Title: {result['title']}")
+        print(f"   - Type: {result['type']}")
+        print(f"   - Status: {result['status']}")
+        
+        return document_id
+        
+    except Exception as e:
+        print(f"❌ Document creation failed: {e}")
+        return None
 
 async def test_pii_masking_text():
     """Test the PII masking endpoint with raw text."""
@@ -132,83 +159,85 @@ async def test_pii_masking_text():
     # Create a temporary user for this test
     user_id = str(uuid4())
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/api/v1/pii/mask",
-                json={"text": SAMPLE_PII_TEXT, "userId": user_id},
-                timeout=60.0
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            print(f"✅ PII masking completed!")
-            print(f"   - Original length: {result['original_length']}")
-            print(f"   - Masked length: {result['masked_length']}")
-            print(f"   - Original: {SAMPLE_PII_TEXT[:100]}...")
-            print(f"   - Masked: {result['masked_content'][:100]}...")
-            
-        except Exception as e:
-            print(f"❌ PII masking failed: {e}")
+    client = await get_client()
+    try:
+        response = await client.post(
+            "/api/v1/pii/mask",
+            # Splice the per-call userId next to the pre-encoded sample text
+            content=b'{"text":' + _SAMPLE_PII_TEXT_JSON + b',"userId":"' + user_id.encode() + b'"}',
+            headers=_JSON_HEADERS,
+            timeout=60.0
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        print(f"✅ PII masking completed!")
+        print(f"   - Original length: {result['original_length']}")
+        print(f"   - Masked length: {result['masked_length']}")
+        print(f"   - Original: {SAMPLE_PII_TEXT[:100]}...")
+        print(f"   - Masked: {result['masked_content'][:100]}...")
+        
+    except Exception as e:
+        print(f"❌ PII masking failed: {e}")
 
 async def test_document_analysis(document_id: str, user_id: str):
     """Test the document analysis endpoint."""
     print("\n📋 Testing Document Analysis...")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/api/v1/documents/{document_id}/analyze",
-                json={"user_id": user_id},
-                timeout=120.0
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            print(f"✅ Document analysis completed!")
-            print(f"   - Document ID: {result['document_id']}")
-            print(f"   - Status: {result['status']}")
-            
-            if result.get('analysis'):
-                analysis = result['analysis']
-                print(f"   - Risk Score: {analysis['risk_score']}/5")
-                print(f"   - Confidence: {analysis['confidence_rating']}%")
-                print(f"   - Summary: {analysis['summary'][:100]}...")
-                print(f"   - Key Concerns: {len(analysis['key_concerns'])} identified")
-                print(f"   - Red Flags: {len(analysis['red_flags'])} identified")
-            else:
-                print(f"   - Processing status: {result['status']}")
-            
-            return result.get('analysis') is not None
-            
-        except Exception as e:
-            print(f"❌ Document analysis failed: {e}")
-            return False
+    client = await get_client()
+    try:
+        response = await client.post(
+            f"/api/v1/documents/{document_id}/analyze",
+            json={"user_id": user_id},
+            timeout=120.0
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        print(f"✅ Document analysis completed!")
+        print(f"   - Document ID: {result['document_id']}")
+        print(f"   - Status: {result['status']}")
+        
+        if result.get('analysis'):
+            analysis = result['analysis']
+            print(f"   - Risk Score: {analysis['risk_score']}/5")
+            print(f"   - Confidence: {analysis['confidence_rating']}%")
+            print(f"   - Summary: {analysis['summary'][:100]}...")
+            print(f"   - Key Concerns: {len(analysis['key_concerns'])} identified")
+            print(f"   - Red Flags: {len(analysis['red_flags'])} identified")
+        else:
+            print(f"   - Processing status: {result['status']}")
+        
+        return result.get('analysis') is not None
+        
+    except Exception as e:
+        print(f"❌ Document analysis failed: {e}")
+        return False
 
 async def test_document_pii_masking(document_id: str, user_id: str):
     """Test PII masking on a document."""
     print("\n🔒 Testing Document PII Masking...")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{BASE_URL}/api/v1/pii/mask/document/{document_id}?user_id={user_id}",
-                timeout=60.0
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            print(f"✅ Document PII masking completed!")
-            print(f"   - Document ID: {result['document_id']}")
-            print(f"   - Original length: {result['original_length']}")
-            print(f"   - Masked length: {result['masked_length']}")
-            print(f"   - Masked at: {result['masked_at']}")
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Document PII masking failed: {e}")
-            return False
+    client = await get_client()
+    try:
+        response = await client.post(
+            f"/api/v1/pii/mask/document/{document_id}?user_id={user_id}",
+            timeout=60.0
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        print(f"✅ Document PII masking completed!")
+        print(f"   - Document ID: {result['document_id']}")
+        print(f"   - Original length: {result['original_length']}")
+        print(f"   - Masked length: {result['masked_length']}")
+        print(f"   - Masked at: {result['masked_at']}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Document PII masking failed: {e}")
+        return False
 
 async def test_chat_message(document_id: str, user_id: str, has_analysis: bool):
     """Test the non-streaming chat endpoint."""
@@ -217,120 +246,124 @@ async def test_chat_message(document_id: str, user_id: str, has_analysis: bool):
     session_id = f"test-session-{uuid4().hex[:8]}"
     message = "What are the main risks in this document?" if has_analysis else "Can you tell me about this document?"
     
-    async with httpx.AsyncClient() as client:
-        try:
-            payload = {
-                "message": message,
-                "session_id": session_id,
-                "document_id": document_id,
-                "user_id": user_id
-            }
-            
-            response = await client.post(
-                f"{BASE_URL}/api/v1/chat/message",
-                json=payload,
-                timeout=120.0
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            print(f"✅ Chat response received!")
-            print(f"   - Session ID: {result['session_id']}")
-            print(f"   - Message ID: {result['message_id']}")
-            print(f"   - Response: {result['response'][:200]}...")
-            
-            return session_id
-            
-        except Exception as e:
-            print(f"❌ Chat failed: {e}")
-            return None
+    client = await get_client()
+    try:
+        payload = {
+            "message": message,
+            "session_id": session_id,
+            "document_id": document_id,
+            "user_id": user_id
+        }
+        
+        response = await client.post(
+            f"/api/v1/chat/message",
+            json=payload,
+            timeout=120.0
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        print(f"✅ Chat response received!")
+        print(f"   - Session ID: {result['session_id']}")
+        print(f"   - Message ID: {result['message_id']}")
+        print(f"   - Response: {result['response'][:200]}...")
+        
+        return session_id
+        
+    except Exception as e:
+        print(f"❌ Chat failed: {e}")
+        return None
 
 async def test_chat_history(session_id: str, document_id: str, user_id: str):
     """Test the chat history endpoint."""
     print("\n📚 Testing Chat History...")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{BASE_URL}/api/v1/chat/history/{session_id}?document_id={document_id}&user_id={user_id}",
-                timeout=30.0
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            print(f"✅ Chat history retrieved!")
-            print(f"   - Session ID: {result['session_id']}")
-            print(f"   - Document ID: {result['document_id']}")
-            print(f"   - Total messages: {result['total_messages']}")
-            
-            for i, msg in enumerate(result['messages'][-2:], 1):  # Show last 2 messages
-                print(f"   - Message {i}: {msg['role']} - {msg['content'][:100]}...")
-            
-        except Exception as e:
-            print(f"❌ Chat history failed: {e}")
+    client = await get_client()
+    try:
+        response = await client.get(
+            f"/api/v1/chat/history/{session_id}?document_id={document_id}&user_id={user_id}",
+            timeout=30.0
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        print(f"✅ Chat history retrieved!")
+        print(f"   - Session ID: {result['session_id']}")
+        print(f"   - Document ID: {result['document_id']}")
+        print(f"   - Total messages: {result['total_messages']}")
+        
+        for i, msg in enumerate(result['messages'][-2:], 1):  # Show last 2 messages
+            print(f"   - Message {i}: {msg['role']} - {msg['content'][:100]}...")
+        
+    except Exception as e:
+        print(f"❌ Chat history failed: {e}")
 
 async def test_get_user_documents(user_id: str):
     """Test getting user documents."""
     print("\n📂 Testing Get User Documents...")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                f"{BASE_URL}/api/v1/documents/?user_id={user_id}",
-                timeout=30.0
-            )
-            response.raise_for_status()
-            
-            result = response.json()
-            print(f"✅ User documents retrieved!")
-            print(f"   - Total documents: {len(result)}")
-            
-            for doc in result:
-                print(f"   - {doc['title']} ({doc['type']}) - {doc['status']}")
-            
-        except Exception as e:
-            print(f"❌ Get user documents failed: {e}")
+    client = await get_client()
+    try:
+        response = await client.get(
+            f"/api/v1/documents/?user_id={user_id}",
+            timeout=30.0
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        print(f"✅ User documents retrieved!")
+        print(f"   - Total documents: {len(result)}")
+        
+        for doc in result:
+            print(f"   - {doc['title']} ({doc['type']}) - {doc['status']}")
+        
+    except Exception as e:
+        print(f"❌ Get user documents failed: {e}")
 
 async def main():
     """Run all tests."""
     print("🚀 Starting SignAware AI API Tests (Updated Schema)...")
     print(f"Base URL: {BASE_URL}")
     
-    # Test health check first
-    if not await test_health_check():
-        print("\n❌ Health check failed. Make sure the server is running.")
-        return
-    
-    # Create a test user
-    user_id = await test_create_user()
-    if not user_id:
-        print("\n❌ Cannot proceed without a user ID.")
-        return
-    
-    # Create a test document
-    document_id = await test_create_document(user_id)
-    if not document_id:
-        print("\n❌ Cannot proceed without a document ID.")
-        return
-    
-    # Test PII masking with text
-    await test_pii_masking_text()
-    
-    # Test document PII masking
-    await test_document_pii_masking(document_id, user_id)
-    
-    # Test document analysis
-    has_analysis = await test_document_analysis(document_id, user_id)
-    
-    # Test chat with document context
-    session_id = await test_chat_message(document_id, user_id, has_analysis)
-    
-    # Test chat history (if chat succeeded)
-    if session_id:
-        await test_chat_history(session_id, document_id, user_id)
-    
-    # Test get user documents
-    await test_get_user_documents(user_id)
+    try:
+        # Test health check first
+        if not await test_health_check():
+            print("\n❌ Health check failed. Make sure the server is running.")
+            return
+        
+        # Create a test user
+        user_id = await test_create_user()
+        if not user_id:
+            print("\n❌ Cannot proceed without a user ID.")
+            return
+        
+        # Create a test document
+        document_id = await test_create_document(user_id)
+        if not document_id:
+            print("\n❌ Cannot proceed without a document ID.")
+            return
+        
+        # Text and document PII masking are independent, so run them concurrently
+        await asyncio.gather(
+            test_pii_masking_text(),
+            test_document_pii_masking(document_id, user_id)
+        )
+        
+        # Test document analysis (after masking, so the masked content is used)
+        has_analysis = await test_document_analysis(document_id, user_id)
+        
+        # Test chat with document context
+        session_id = await test_chat_message(document_id, user_id, has_analysis)
+        
+        # Test chat history (if chat succeeded)
+        if session_id:
+            await test_chat_history(session_id, document_id, user_id)
+        
+        # Test getting user documents (last, so it lists the analyzed document)
+        await test_get_user_documents(user_id)
+    finally:
+        if _client is not None:
+            await _client.aclose()
     
     print("\n✨ All tests completed!")
     print("\n📖 Next steps:")